@@ -1,19 +1,39 @@
 import datetime
 import logging
 import os
+import re
 from datetime import date, timedelta
-from glob import glob
 from pathlib import Path
 
 import pandas as pd
 import polars as pl
 from CONSTANTS import SYDNEY_SUBURBS
 from pretty_html_table import build_table
-from utils import logger, save_path, timer
+from utils import capitalize_text, logger, save_path, timer
 
 
 # ! 18-Sep-23 ~ Removed prices until I figure out how to scrape all of them
 
+# Suburbs cased the same way `Gig.to_dict` cases the suburb column, e.g.
+# "McMahons Point" -> "Mcmahons Point"
+SYDNEY_SUBURBS_TITLECASE = pl.Series(
+    "suburb", [capitalize_text(suburb) for suburb in SYDNEY_SUBURBS]
+)
+
+# Escaped text in the HTML table and its replacement, applied in a single pass
+HTML_REPLACEMENTS = {
+    "&lt;": "<",
+    "&gt;": ">",
+    "&amp;": "&",
+    "_blank": "'_blank'",
+    "\\": "'",
+}
+HTML_PATTERN = re.compile("|".join(map(re.escape, HTML_REPLACEMENTS)))
+
+# Output files, resolved once at import
+HTML_FILE = save_path("gigs/data_files", "html.txt")
+ANNUAL_FILE = save_path("gigs/data_files", "annual_gigs.csv")
+
 
 def create_file_list(omit_files: tuple[str, ...]) -> list[str]:
     """
@@ -36,19 +56,23 @@ def create_file_list(omit_files: tuple[str, ...]) -> list[str]:
         print(file_list)
         ```
     """
-    data_filenames = glob(f"{str(Path.cwd() / 'data')}/*.json")
-    return [f for f in data_filenames if not f.endswith(omit_files)]
+    with os.scandir(Path.cwd() / "data") as entries:
+        return [
+            entry.path
+            for entry in entries
+            if entry.name.endswith(".json") and not entry.name.endswith(omit_files)
+        ]
 
 
-def combine_tables(json_list: list[str]) -> pl.DataFrame:
+def combine_tables(json_list: list[str]) -> pl.LazyFrame:
     """
-    Combines multiple tables from JSON files into a single DataFrame.
+    Combines multiple tables from NDJSON files into a single LazyFrame.
 
     Args:
-        json_list (list[str]): A list of file paths to JSON files.
+        json_list (list[str]): A list of file paths to NDJSON files.
 
     Returns:
-        pl.DataFrame: The concatenated DataFrame.
+        pl.LazyFrame: The concatenated LazyFrame.
 
     Example:
         ```python
@@ -58,45 +82,45 @@ def combine_tables(json_list: list[str]) -> pl.DataFrame:
             "/path/to/file3.json"
         ]
 
-        combined_df = combine_tables(json_files)
+        combined_df = combine_tables(json_files).collect()
         print(combined_df)
         ```
     """
-    df_list = []
-    for f in json_list:
-        df = pl.read_json(f)
-        df_list.append(df)
-    return pl.concat(df_list)
+    return pl.concat([pl.scan_ndjson(f) for f in json_list])
 
 
-def apply_formats(df: pl.DataFrame) -> pl.DataFrame:
-    df = df.with_columns(
-        pl.col(["title", "venue"]).str.to_lowercase(),
-        pl.col("suburb").str.to_titlecase(),
-    )
-    return df
-
-
-def add_columns(df: pl.DataFrame) -> pl.DataFrame:
+def add_columns(lf: pl.LazyFrame) -> pl.LazyFrame:
     state = "NSW"
     state_column = "in_nsw"
     city_column = "in_sydney"
 
-    df = df.with_columns((pl.col("state") == state.upper()).alias(state_column))
-    df = df.with_columns(pl.col("suburb").is_in(SYDNEY_SUBURBS).alias(city_column))
+    return lf.with_columns(
+        (pl.col("state") == state.upper()).alias(state_column),
+        pl.col("suburb").is_in(SYDNEY_SUBURBS_TITLECASE).alias(city_column),
+        pl.col("event_date").str.to_date("%d %b %Y", cache=True),
+    )
 
-    df = df.with_columns(pl.col("event_date").str.strptime(pl.Date, format="%d %b %Y"))
-    df = df.with_columns(pl.col("event_date").dt.strftime("%d-%b-%y, %a").alias("Date"))
 
-    df = df.with_columns(
-        pl.col("price").map_elements(
-            lambda price: f"${price:.2f}" if price != 0 else "-",  # type: ignore
-            return_dtype=pl.Utf8,
+def add_display_columns(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Adds the formatted `Date` column and formats `price` for display. Applied after
+    `apply_filter` so that filtered-out rows are never formatted.
+    """
+    cents = (pl.col("price") * 100).round(0).cast(pl.Int64)
+    return lf.with_columns(
+        pl.col("event_date").dt.strftime("%d-%b-%y, %a").alias("Date"),
+        pl.when(pl.col("price") == 0)
+        .then(pl.lit("-"))
+        .otherwise(
+            pl.format(
+                "${}.{}",
+                cents // 100,
+                (cents % 100).cast(pl.Utf8).str.zfill(2),
+            )
         )
+        .alias("price"),
     )
 
-    return df
-
 
 def create_date_filters() -> tuple[datetime.date, ...]:
     today = date.today()
@@ -106,25 +130,26 @@ def create_date_filters() -> tuple[datetime.date, ...]:
 
 
 def apply_filter(
-    df: pl.DataFrame, today: datetime.date, end_year: datetime.date
-) -> pl.DataFrame:
+    lf: pl.LazyFrame, today: datetime.date, end_year: datetime.date
+) -> pl.LazyFrame:
     state_column = "in_nsw"
     city_column = "in_sydney"
     date_column = "event_date"
 
-    df = df.filter(pl.col(state_column) & pl.col(city_column))
-    df = df.filter(pl.col(date_column).is_between(today, end_year))
-
-    return df
+    return lf.filter(
+        pl.col(state_column)
+        & pl.col(city_column)
+        & pl.col(date_column).is_between(today, end_year)
+    )
 
 
-def apply_sort(df: pl.DataFrame) -> pl.DataFrame:
-    return df.lazy().sort("event_date", descending=False).collect()
+def apply_sort(lf: pl.LazyFrame) -> pl.LazyFrame:
+    return lf.sort("event_date", descending=False)
 
 
-def remove_duplicate_rows(df: pl.DataFrame) -> pl.DataFrame:
-    df = df.unique(subset=["title"], maintain_order=True)
-    return df.unique(subset=["title", "venue"], maintain_order=True)
+def remove_duplicate_rows(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # Titles are unique after this pass, so a further (title, venue) pass is a no-op
+    return lf.unique(subset=["title"], keep="first", maintain_order=True)
 
 
 def build_month_table(
@@ -151,13 +176,7 @@ def build_month_table(
 
 
 def replace_text_values(table: str) -> str:
-    return (
-        table.replace("&lt;", "<")
-        .replace("&gt;", ">")
-        .replace("&amp;", "&")
-        .replace("_blank", "'_blank'")
-        .replace("\\", "'")
-    )
+    return HTML_PATTERN.sub(lambda match: HTML_REPLACEMENTS[match[0]], table)
 
 
 def build_html_table(df: pd.DataFrame) -> str:
@@ -182,12 +201,10 @@ def save_to_text(
     df: pl.DataFrame, date_column: str, today: datetime.date, end_month: datetime.date
 ):
     month_table = build_month_table(df, "event_date", today, end_month)
-    month_table.write_csv(file=save_path("gigs/data_files", "month_table.csv"))
-    month_csv = pd.read_csv(save_path("gigs/data_files", "month_table.csv"))
-    html_table = build_html_table(month_csv)
-    fp = save_path("gigs/data_files", "html.txt")
-    with open(fp, "w") as file:
-        file.writelines(html_table)
+    month_pd = pd.DataFrame(month_table.to_dict(as_series=False))
+    html_table = build_html_table(month_pd)
+    with open(HTML_FILE, "w", encoding="utf-8") as file:
+        file.write(html_table)
 
 
 def build_annual_table(df: pl.DataFrame) -> pl.DataFrame:
@@ -210,14 +227,16 @@ def build_tables():
 
     today, end_month, end_year = create_date_filters()
     omit_files = ("mtix_cache.json", "mtix_price.json", "mtix_venues.json")
-    df = combine_tables(json_list=create_file_list(omit_files))
+    lf = combine_tables(json_list=create_file_list(omit_files))
 
+    # Single lazy query so that the filters run before the display formatting
     df = (
-        df.pipe(apply_formats)
-        .pipe(add_columns)
+        lf.pipe(add_columns)
         .pipe(apply_filter, today, end_year)
+        .pipe(add_display_columns)
         .pipe(apply_sort)
         .pipe(remove_duplicate_rows)
+        .collect(streaming=True)
     )
 
     # Build HTML table (30 days) | Conversion from polars to pandas
@@ -225,7 +244,7 @@ def build_tables():
 
     # Build CSV table (365 days)
     annual_table = build_annual_table(df)
-    annual_table.write_csv(file=save_path("gigs/data_files", "annual_gigs.csv"))
+    annual_table.write_csv(file=ANNUAL_FILE)
 
 
 if __name__ == "__main__":
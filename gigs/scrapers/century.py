@@ -1,53 +1,102 @@
+import asyncio
 import logging
 import os
 import re
 import sys
-import unicodedata
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
 import httpx
-from pydantic import field_validator
-from selectolax.parser import HTMLParser
+from selectolax.lexbor import LexborHTMLParser
 
 from gigs.CONSTANTS import CENTURY_VENUES
 from gigs.utils import (
     Gig,
     WebScraper,
+    create_async_client,
     custom_headers,
-    export_json,
+    export_ndjson,
+    fetch,
     logger,
+    remove_accents,
     save_path,
     timer,
 )
 
-
+PRICE_PATTERN = re.compile(r"\d+\.\d+")
+IMAGE_URL_PATTERN = re.compile(r"\S*http\S*")
+# Requests in flight at once; kept below the client's keep-alive pool size
+MAX_CONCURRENT_REQUESTS = 16
+MONTHS = {
+    month: number
+    for number, month in enumerate(
+        (
+            "January",
+            "February",
+            "March",
+            "April",
+            "May",
+            "June",
+            "July",
+            "August",
+            "September",
+            "October",
+            "November",
+            "December",
+        ),
+        start=1,
+    )
+}
+
+# CSS selectors
+EVENT_CARD_TAG = "div#row-inner-search > a"
+SESSION_DATE_TAG = "li.session-date"
+TITLE_TAG = "h1.title"
+SESSIONS_TAG = "ul.sessions"
+GENRE_TAG = "ul.category.inline-list"
+IMAGE_TAG = "div#row-inner-event-hero > div.cell.small-24"
+
+
+def clean_date(date_str: str) -> str:
+    # Tuesday, 09 January 2024 07:00 PM
+    _, day, month, year, time, meridiem = date_str.split()
+    hour, minute = time.split(":")
+    meridiem = meridiem.upper()
+    if meridiem not in ("AM", "PM"):
+        raise ValueError(f"Unknown meridiem in date '{date_str}'.")
+    try:
+        month_number = MONTHS[month.title()]
+    except KeyError as exc:
+        raise ValueError(f"Unknown month in date '{date_str}'.") from exc
+    hour, minute = int(hour), int(minute)
+    if not (1 <= hour <= 12 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time in date '{date_str}'.")
+    hour = hour % 12 + (12 if meridiem == "PM" else 0)
+    return datetime(int(year), month_number, int(day), hour, minute).isoformat()
+
+
+def clean_genre(text: str) -> str:
+    if "Music - " in text:
+        return text.replace("Music - ", "").strip()
+    elif "Comedy" in text:
+        return "Comedy"
+    elif "Arts" in text:
+        return "Arts"
+    elif "Other" in text:
+        return text.replace("Other - ", "").strip()
+    else:
+        return "-"
+
+
+@dataclass(slots=True)
 class CenturyGig(Gig):
     source: str = "Century"
 
-    @field_validator("date")
-    def clean_date(cls, date_str):
-        fmt = "%A, %d %B %Y %I:%M %p"  # Tuesday, 09 January 2024 07:00 PM
-        return datetime.strptime(date_str, fmt).isoformat()
-
-    @field_validator("title")
-    def remove_accents(cls, text):
-        return (
-            unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-        )
-
-    @field_validator("genre")
-    def clean_genre(cls, text):
-        if "Music - " in text:
-            return text.replace("Music - ", "").strip()
-        elif "Comedy" in text:
-            return "Comedy"
-        elif "Arts" in text:
-            return "Arts"
-        elif "Other" in text:
-            return text.replace("Other - ", "").strip()
-        else:
-            return "-"
+    def __post_init__(self) -> None:
+        self.date = clean_date(self.date)
+        self.title = remove_accents(self.title)
+        self.genre = clean_genre(self.genre)
 
 
 class CenturyScraper(WebScraper):
@@ -55,32 +104,23 @@ class CenturyScraper(WebScraper):
         super().__init__()
         self.venues = CENTURY_VENUES
         self.headers = custom_headers
-        self.event_card_tag = "div#row-inner-search > a"
-        self._event_cards = self._get_event_cards()
-        self.data = self._get_data()
-
-    def _get_event_cards(self) -> list[dict[str, str]] | None:
-        total_events = []
-        with httpx.Client(headers=self.headers) as client:
-            for venue in self.venues:
-                url = venue["url"]
-
-                # fetch events from each venue's webpage
-                try:
-                    r = client.get(url)
-                    html = HTMLParser(r.text)
-                    cards = html.css(self.event_card_tag)
-                    total_events.extend(
-                        {
-                            "url": card.css_first("a").attributes["href"],
-                            "name": venue["name"],
-                            "suburb": venue["suburb"],
-                            "state": venue["state"],
-                        }
-                        for card in cards
-                    )
-                except Exception as exc:
-                    logging.error(f"Error scraping '{url}': {exc}.")
+        self._event_cards: list[dict[str, str]] | None = None
+        self.data = asyncio.run(self._run())
+
+    async def _run(self) -> list[dict[str, Any]] | None:
+        async with create_async_client(self.headers) as client:
+            self._event_cards = await self._get_event_cards(client)
+            return await self._get_data(client)
+
+    async def _get_event_cards(
+        self, client: httpx.AsyncClient
+    ) -> list[dict[str, str]] | None:
+        # fetch events from each venue's webpage
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        venues = await asyncio.gather(
+            *(self._get_venue_cards(client, venue, semaphore) for venue in self.venues)
+        )
+        total_events = [card for cards in venues for card in cards]
 
         if total_events:
             logging.warning(f"Found {len(total_events)} events.")
@@ -88,32 +128,70 @@ class CenturyScraper(WebScraper):
         else:
             return None
 
-    def _get_data(self) -> list[dict[str, Any]] | None:
+    async def _get_venue_cards(
+        self,
+        client: httpx.AsyncClient,
+        venue: dict[str, str],
+        semaphore: asyncio.Semaphore,
+    ) -> list[dict[str, str]]:
+        # Parse each venue page as soon as it arrives, while the others are in flight
+        r = await fetch(client, venue["url"], semaphore)
+        if r is None:
+            return []
+        try:
+            html = LexborHTMLParser(r.content)
+            # The selector already matches the <a> tags, so read each href directly
+            hrefs = (card.attributes.get("href") for card in html.css(EVENT_CARD_TAG))
+            return [
+                {
+                    "url": href,
+                    "name": venue["name"],
+                    "suburb": venue["suburb"],
+                    "state": venue["state"],
+                }
+                for href in hrefs
+                if href
+            ]
+        except Exception as exc:
+            logging.error(f"Error scraping '{venue['url']}': {exc}.")
+            return []
+
+    async def _get_data(self, client: httpx.AsyncClient) -> list[dict[str, Any]] | None:
         if self._event_cards is None:
             return None
 
-        result = []
-        with httpx.Client(headers=self.headers) as client:
-            for card in self._event_cards:
-                url = card["url"]
-                try:
-                    r = client.get(url)
-                    html = HTMLParser(r.text)
-                    gig = self._build_event_object(card, html)
-                    result.append(gig)
-                except Exception as exc:
-                    logging.error(f"Unable to get data from url '{url}': {exc}.")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        events = await asyncio.gather(
+            *(self._get_event(client, card, semaphore) for card in self._event_cards)
+        )
+        result = [gig for gig in events if gig is not None]
         if result:
             logging.warning(f"Successfully parsed {len(result)} events.")
             return result
         else:
             return None
 
-    def _build_event_object(self, card: dict[str, str], html: HTMLParser) -> dict:
+    async def _get_event(
+        self,
+        client: httpx.AsyncClient,
+        card: dict[str, str],
+        semaphore: asyncio.Semaphore,
+    ) -> dict | None:
+        # Parse each page as soon as it arrives so its body can be released
+        r = await fetch(client, card["url"], semaphore)
+        if r is None:
+            return None
+        try:
+            return self._build_event_object(card, LexborHTMLParser(r.content))
+        except Exception as exc:
+            logging.error(f"Unable to get data from url '{card['url']}': {exc}.")
+            return None
+
+    def _build_event_object(self, card: dict[str, str], html: LexborHTMLParser) -> dict:
         obj = CenturyGig(
-            date=html.css_first("li.session-date").text(),
-            title=html.css_first("h1.title").text(),
-            price=self._get_price(text=self._extract_ticket_prices(html)),
+            date=html.css_first(SESSION_DATE_TAG).text(),
+            title=html.css_first(TITLE_TAG).text(),
+            price=self._get_price(html),
             genre=self._get_genre(html),
             venue=card["name"],
             suburb=card["suburb"],
@@ -121,93 +199,72 @@ class CenturyScraper(WebScraper):
             url=card["url"],
             image=self._get_image(html),
         )
-        return obj.model_dump()
+        return obj.to_dict()
 
-    def _get_price(self, text: str) -> float:
+    def _get_price(self, html: LexborHTMLParser) -> float:
         """
-        Fetches the minimum price from a string of text containing prices.
+        Fetches the minimum ticket price from the first item of each session list,
+        scanning each item's text directly rather than joining them first.
 
         Args:
-            text (str): The text containing prices.
+            html (LexborHTMLParser): The object representing the parsed HTML.
 
         Returns:
-            float: The minimum price extracted from the text. Returns 0.0 if no prices are found.
+            float: The minimum price found. Returns 0.0 if no prices are found.
 
         Examples:
-            >>> text = "Ticket prices: $10, $15, $20"
-            >>> fetch_price(text)
+            >>> html_tree = LexborHTMLParser(html_content)
+            >>> get_price(html_tree)
             10.0
         """
-        result = re.findall(pattern=r"\d+\.\d+", string=text)
-        if len(result) == 0:
-            return 0.0
-        prices = list(map(lambda i: float(i), result))
-        return min(prices)
-
-    def _extract_ticket_prices(self, html: HTMLParser) -> str:
-        """
-        Extracts ticket prices from an HTMLParser tree.
-
-        Args:
-            tree (HTMLParser): The HTMLParser tree representing the parsed HTML.
-
-        Returns:
-            str: The extracted ticket prices as a string.
+        items = (session.css_first("li") for session in html.css(SESSIONS_TAG))
+        return min(
+            (
+                float(m.group())
+                for item in items
+                if item is not None
+                for m in PRICE_PATTERN.finditer(item.text())
+            ),
+            default=0.0,
+        )
 
-        Examples:
-            >>> html_tree = HTMLParser(html_content)
-            >>> extract_ticket_prices(html_tree)
-            'Ticket prices: $10 - $20'
+    def _get_genre(self, html: LexborHTMLParser) -> str:
         """
-        result = ""
-        for text in html.css("ul.sessions"):
-            try:
-                item = text.css_first("li").text()
-                result += item
-            except AttributeError:
-                continue
-        return result
-
-    def _get_genre(self, html: HTMLParser) -> str:
-        """
-        Fetches the genre from an HTMLParser object.
+        Fetches the genre from a LexborHTMLParser object.
 
         Args:
-            html (HTMLParser): The HTMLParser object representing the parsed HTML.
+            html (LexborHTMLParser): The object representing the parsed HTML.
 
         Returns:
             str: The fetched genre. Returns "-" if the genre is not found.
 
         Examples:
-            >>> html_tree = HTMLParser(html_content)
+            >>> html_tree = LexborHTMLParser(html_content)
             >>> fetch_genre(html_tree)
             'Rock'
         """
-        node = html.css_first("ul.category.inline-list").last_child
+        node = html.css_first(GENRE_TAG).last_child
         return "-" if node is None else node.text().strip()
 
-    def _get_image(self, html: HTMLParser) -> str:
+    def _get_image(self, html: LexborHTMLParser) -> str:
         """
-        Fetches the image URL from an HTMLParser object.
+        Fetches the image URL from a LexborHTMLParser object.
 
         Args:
-            html (HTMLParser): The HTMLParser object representing the parsed HTML.
+            html (LexborHTMLParser): The object representing the parsed HTML.
 
         Returns:
-            str: The fetched image URL.
-
-        Raises:
-            StopIteration: If no image URL is found.
+            str: The fetched image URL. Returns "-" if no image URL is found.
 
         Examples:
-            >>> html_tree = HTMLParser(html_content)
+            >>> html_tree = LexborHTMLParser(html_content)
             >>> fetch_image(html_tree)
             'https://example.com/image.jpg'
         """
-        card = html.css("div#row-inner-event-hero > div.cell.small-24")
-        for img in card:
-            image_urls = img.css_first("style").text(strip=True).split(" ")
-        return next(url for url in image_urls if "http" in url)  # type: ignore
+        card = html.css_first(IMAGE_TAG)
+        style = None if card is None else card.css_first("style")
+        match = None if style is None else IMAGE_URL_PATTERN.search(style.text())
+        return "-" if match is None else match.group()
 
 
 @timer
@@ -217,7 +274,7 @@ def century():
     data = CenturyScraper().data
     if data is None:
         sys.exit(1)
-    export_json(data, filepath=save_path("data", "century.json"))
+    export_ndjson(data, filepath=save_path("data", "century.json"))
 
 
 if __name__ == "__main__":
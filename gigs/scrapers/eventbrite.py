@@ -1,26 +1,37 @@
+import asyncio
 import logging
 import os
 import re
 import sys
-import unicodedata
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
-import chompjs
 import httpx
-from pydantic import field_validator
-from selectolax.parser import HTMLParser
+from selectolax.lexbor import LexborHTMLParser
 
 from gigs.utils import (
     Gig,
     WebScraper,
+    create_async_client,
     custom_headers,
-    export_json,
+    export_ndjson,
+    fetch,
     logger,
+    parse_json_ld,
+    remove_accents,
     save_path,
     timer,
 )
 
+# Searched against the raw response body, so no HTML parse is needed to paginate
+PAGE_COUNT_PATTERN = re.compile(rb'"page_count": *(\d{1,3})')
+# Search pages requested at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# CSS selector
+JSON_TAG = "script[type='application/ld+json']"
+
 
 class EventbriteScraper(WebScraper):
     def __init__(self) -> None:
@@ -29,64 +40,76 @@ class EventbriteScraper(WebScraper):
             "https://www.eventbrite.com.au/d/australia/music--performances/?page="
         )
         self.headers = custom_headers
-        self.json_tag = "script[type='application/ld+json']"
-        self.javascript_tag = "script[type='text/javascript']"
         self.dest_cache_file = "eventbrite_cache.json"
-        self.last_page = self._get_last_page()
-        self.cache_data = self._get_events()
-
-    def _get_last_page(self) -> int | None:
-        start_page = 1
-        url = f"{self.base_url}{start_page}"
-        response = self._get_request(url, self.headers)
+        self.last_page: int | None = None
+        self.cache_data: list[dict[str, Any]] | None = None
+
+    async def run(self) -> None:
+        async with create_async_client(self.headers) as client:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            # The first page is both the pagination probe and a page of events
+            first_page = await fetch(client, f"{self.base_url}1", semaphore)
+            self.last_page = self._get_last_page(first_page)
+            self.cache_data = await self._get_events(client, semaphore, first_page)
+        if self.cache_data is not None:
+            self.export_json(
+                data=self.cache_data, filepath=save_path("cache", self.dest_cache_file)
+            )
+
+    def _get_last_page(self, response: httpx.Response | None) -> int | None:
         if response is not None:
             return self._parse_javascript_text(response)
         logging.error("Unable to find last Eventbrite page.")
         return None
 
     def _parse_javascript_text(self, response: httpx.Response) -> int | None:
-        html = HTMLParser(response.text)
-        script_tags = html.css(self.javascript_tag)
-        text = "".join(script.text().strip() for script in script_tags).replace(" ", "")
-        if match := re.search(pattern=r'"page_count":(\d{1,3})', string=text):
+        if match := PAGE_COUNT_PATTERN.search(response.content):
             return int(match[1]) + 1
         else:
             return None
 
-    def _get_events(self) -> list[dict[str, Any]] | None:
-        if self.last_page is None:
+    async def _get_events(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        first_page: httpx.Response | None,
+    ) -> list[dict[str, Any]] | None:
+        if self.last_page is None or first_page is None:
             return None
 
         # Extract events from each web page
-        total_events = []
-        with httpx.Client(headers=self.headers) as client:
-            for page in range(1, self.last_page):
-                url = f"{self.base_url}{page}"
-                try:
-                    r = client.get(url)
-                    html = HTMLParser(r.text)
-                    if json_tags := html.css(self.json_tag):
-                        for json in json_tags:
-                            data_obj = chompjs.parse_js_object(json.text())
-                            total_events.append(data_obj)
-                except Exception as exc:
-                    logging.error(f"Unable to parse JSON tag at URL '{url}': {exc}.")
-        logging.warning(f"Found {len(total_events)} events.")
-        self.export_json(
-            data=total_events, filepath=save_path("cache", self.dest_cache_file)
+        pages = await asyncio.gather(
+            *(
+                self._get_page_events(client, page, semaphore)
+                for page in range(2, self.last_page)
+            )
         )
+        total_events = self._parse_page(first_page)
+        total_events.extend(event for events in pages for event in events)
+        logging.warning(f"Found {len(total_events)} events.")
         return total_events
 
+    async def _get_page_events(
+        self, client: httpx.AsyncClient, page: int, semaphore: asyncio.Semaphore
+    ) -> list[dict[str, Any]]:
+        r = await fetch(client, f"{self.base_url}{page}", semaphore)
+        return [] if r is None else self._parse_page(r)
 
+    def _parse_page(self, response: httpx.Response) -> list[dict[str, Any]]:
+        try:
+            html = LexborHTMLParser(response.content)
+            return [parse_json_ld(json.text()) for json in html.css(JSON_TAG)]
+        except Exception as exc:
+            logging.error(f"Unable to parse JSON tag at URL '{response.url}': {exc}.")
+            return []
+
+
+@dataclass(slots=True)
 class EventbriteGig(Gig):
     source: str = "Eventbrite"
 
-    @field_validator("title")
-    def remove_accents(cls, text):
-        text = (
-            unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-        )
-        return text.strip()
+    def __post_init__(self) -> None:
+        self.title = remove_accents(self.title).strip()
 
 
 def get_location_info(event: dict) -> tuple[str, ...]:
@@ -98,10 +121,15 @@ def get_location_info(event: dict) -> tuple[str, ...]:
     except Exception:
         return "-", "-", "-"
 
+
 def get_date(event: dict) -> str:
     try:
-        date_str = event["startDate"]
-        return datetime.strptime(date_str, "%Y-%m-%d").isoformat()
+        date_str = event["startDate"]  # 2024-01-05, or with a time part
+        if date_str[4:5] != "-" or date_str[7:8] != "-":
+            raise ValueError(f"Unexpected date '{date_str}'.")
+        return datetime(
+            int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])
+        ).isoformat()
     except Exception:
         return "2099-01-01T00:00:00"
 
@@ -110,16 +138,19 @@ def parse_cache_data(events: list[dict[str, Any]]):
     data = []
     for event in events:
         venue, suburb, state = get_location_info(event)
-        gig = EventbriteGig(
-            date=get_date(event),
-            title=event.get("name", "-"),
-            venue=venue,
-            suburb=suburb,
-            state=state,
-            url=event.get("url", "-"),
-            image=event.get("image", "-"),
-        )
-        data.append(gig.model_dump())
+        try:
+            gig = EventbriteGig(
+                date=get_date(event),
+                title=event.get("name", "-"),
+                venue=venue,
+                suburb=suburb,
+                state=state,
+                url=event.get("url", "-"),
+                image=event.get("image", "-"),
+            )
+            data.append(gig.to_dict())
+        except Exception as exc:
+            logging.error(f"Error parsing data for '{event.get('url', '-')}': {exc}.")
     return data
 
 
@@ -128,12 +159,13 @@ def parse_cache_data(events: list[dict[str, Any]]):
 def eventbrite():
     logging.warning(f"Running {os.path.basename(__file__)}")
     bot = EventbriteScraper()
+    asyncio.run(bot.run())
     raw_data = bot.cache_data
     if raw_data is None:
         sys.exit(1)
 
     clean_data = parse_cache_data(raw_data)
-    export_json(clean_data, filepath=save_path("data", "eventbrite.json"))
+    export_ndjson(clean_data, filepath=save_path("data", "eventbrite.json"))
 
 
 if __name__ == "__main__":
@@ -1,12 +1,29 @@
+import asyncio
 import logging
 import os
 import sys
 
-import chompjs
 import httpx
-from selectolax.parser import HTMLParser, Node
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
-from gigs.utils import Gig, WebScraper, custom_headers, export_json, logger, save_path, timer
+from gigs.utils import (
+    WebScraper,
+    create_async_client,
+    custom_headers,
+    export_json,
+    fetch,
+    logger,
+    parse_json_ld,
+    save_path,
+    timer,
+)
+
+# Search pages requested at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# CSS selectors
+PAGE_TAG = "section.moduleseparator"
+JSON_TAG = "script[type='application/ld+json']"
 
 
 class MoshtixScraper(WebScraper):
@@ -16,16 +33,12 @@ class MoshtixScraper(WebScraper):
             "https://www.moshtix.com.au/v2/search?query=&CategoryList=2&refine="
         )
         self._headers = custom_headers
-        self._page_tag = "section.moduleseparator"
-        self._json_tag = "script[type='application/ld+json']"
-        self._event_tag = "div.searchresult.clearfix"
-        self.end_page = self._get_end_page()
-        self.event_nodes = self._get_event_nodes()
-
-    def _extract_page_number(self, response: httpx.Response) -> int | None:
-        html = HTMLParser(response.text)
+        self.end_page: int | None = None
+        self.event_nodes = asyncio.run(self._run())
+
+    def _extract_page_number(self, html: LexborHTMLParser) -> int | None:
         try:
-            pagination_text = html.css_first(self._page_tag).text(strip=True).split(" ")
+            pagination_text = html.css_first(PAGE_TAG).text(strip=True).split(" ")
             page_num = int(pagination_text[-1]) + 1
             logging.warning(f"End page is {page_num}.")
             return page_num
@@ -33,36 +46,58 @@ class MoshtixScraper(WebScraper):
             logging.error(f"Unable to extract last page: {exc}.")
             return None
 
-    def _get_end_page(self, start_page: int = 1) -> int | None:
-        url = f"{self.base_url}{start_page}"
-        r = self._get_request(url, self._headers)
-        return None if r is None else self._extract_page_number(r)
+    async def _run(self) -> list[LexborNode] | None:
+        async with create_async_client(self._headers) as client:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            # The first page is both the pagination probe and a page of events
+            first_page = await fetch(client, f"{self.base_url}1", semaphore)
+            if first_page is None:
+                return None
+            html = LexborHTMLParser(first_page.content)
+            self.end_page = self._extract_page_number(html)
+            return await self._get_event_nodes(client, semaphore, html)
 
-    def _get_event_nodes(self, start_page: int = 1) -> list[Node] | None:
+    async def _get_event_nodes(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        first_page: LexborHTMLParser,
+    ) -> list[LexborNode] | None:
         end_page = self.end_page
         if end_page is None:
             return None
 
-        # Extract nodes from each page
-        result = []
-        with httpx.Client(headers=self._headers) as client:
-            for page in range(start_page, end_page):
-                url = f"{self.base_url}{page}"
-                logging.warning(url)
-                try:
-                    r = client.get(url)
-                    html = HTMLParser(r.text)
-                    nodes = html.css(self._json_tag)
-                    result.extend(nodes)
-                except Exception as exc:
-                    logging.error(f"Unable to fetch JSON nodes at URL '{url}': {exc}.")
+        # Extract nodes from each remaining page
+        pages = await asyncio.gather(
+            *(
+                self._get_page_nodes(client, page, semaphore)
+                for page in range(2, end_page)
+            )
+        )
+        result = first_page.css(JSON_TAG)
+        result.extend(node for nodes in pages for node in nodes)
         return result
 
+    async def _get_page_nodes(
+        self, client: httpx.AsyncClient, page: int, semaphore: asyncio.Semaphore
+    ) -> list[LexborNode]:
+        url = f"{self.base_url}{page}"
+        logging.warning(url)
+        r = await fetch(client, url, semaphore)
+        if r is None:
+            return []
+        try:
+            html = LexborHTMLParser(r.content)
+            return html.css(JSON_TAG)
+        except Exception as exc:
+            logging.error(f"Unable to fetch JSON nodes at URL '{url}': {exc}.")
+            return []
+
 
-def extract_event_data(event_nodes: list[Node]) -> list[dict]:
+def extract_event_data(event_nodes: list[LexborNode]) -> list[dict]:
     data = []
     for node in event_nodes:
-        event_dict = chompjs.parse_js_object(node.text())
+        event_dict = parse_json_ld(node.text())
         data.extend(event_dict)
     return data
 
@@ -1,31 +1,29 @@
 import logging
 import os
-import unicodedata
+from dataclasses import dataclass
 
-from pydantic import field_validator
+from gigs.utils import (
+    Gig,
+    export_ndjson,
+    logger,
+    open_json,
+    remove_accents,
+    save_path,
+    timer,
+)
 
-from gigs.utils import Gig, export_json, logger, open_json, save_path, timer
 
+def clean_text(text: str) -> str:
+    return text if text == "-" else remove_accents(text).strip()
 
+
+@dataclass(slots=True)
 class MoshtixGig(Gig):
     source: str = "Moshtix"
 
-    @field_validator("title", "url")
-    def remove_accents(cls, v):
-        if v != "-":
-            text = (
-                unicodedata.normalize("NFD", v)
-                .encode("ascii", "ignore")
-                .decode("utf-8")
-            )
-            return text.strip()
-
-    @field_validator("suburb")
-    def capitalize_text(cls, text):
-        if " " in text:
-            words = text.split(" ")
-            return " ".join(word.capitalize() for word in words)
-        return text.capitalize()
+    def __post_init__(self) -> None:
+        self.title = clean_text(self.title)
+        self.url = clean_text(self.url)
 
 
 def get_location_info(event: dict) -> tuple[str, ...]:
@@ -41,30 +39,30 @@ def get_location_info(event: dict) -> tuple[str, ...]:
 
 def get_price(event: dict) -> float:
     nums = event.get("offers", [])
-    if len(nums) == 0:
-        return 0.0
-    elif len(nums) == 1:
-        return float(nums[0].get("price", 0.0))
-    else:
-        prices = [float(num["price"]) for num in nums]
-        return min(prices)
+    return min((float(num.get("price", 0.0)) for num in nums), default=0.0)
+
+
+def build_gig(event: dict) -> MoshtixGig:
+    venue, suburb, state = get_location_info(event)
+    return MoshtixGig(
+        date=event.get("startDate", "2099-01-01T00:00:00"),
+        title=event.get("name", "-"),
+        price=get_price(event),
+        venue=venue,
+        suburb=suburb,
+        state=state,
+        url=event.get("url", "-"),
+        image=event.get("image", "-"),
+    )
 
 
 def extract_data(events: list[dict]) -> list[dict]:
     data = []
     for event in events:
-        venue, suburb, state = get_location_info(event)
-        gig = MoshtixGig(
-            date=event.get("startDate", "2099-01-01T00:00:00"),
-            title=event.get("name", "-"),
-            price=get_price(event),
-            venue=venue,
-            suburb=suburb,
-            state=state,
-            url=event.get("url", "-"),
-            image=event.get("image", "-"),
-        )
-        data.append(gig.model_dump())
+        try:
+            data.append(build_gig(event).to_dict())
+        except Exception as exc:
+            logging.error(f"Error parsing data for '{event.get('url', '-')}': {exc}.")
     return data
 
 
@@ -79,7 +77,7 @@ def moshtix_parse():
     events = open_json(filepath=save_path("cache", source_file))
     data = extract_data(events)
     logging.warning(f"Parsed {len(data)} events.")
-    export_json(data, filepath=save_path("data", destination_file))
+    export_ndjson(data, filepath=save_path("data", destination_file))
 
 
 if __name__ == "__main__":
@@ -1,13 +1,33 @@
+import asyncio
 import logging
 import os
 import sys
-import unicodedata
+from dataclasses import dataclass
 
 import httpx
-from pydantic import field_validator
-from selectolax.parser import HTMLParser
-
-from gigs.utils import Gig, WebScraper, custom_headers, export_json, logger, save_path, timer
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+
+from gigs.utils import (
+    Gig,
+    WebScraper,
+    create_async_client,
+    custom_headers,
+    export_ndjson,
+    fetch,
+    get_post_response,
+    logger,
+    parse_price,
+    remove_accents,
+    save_path,
+    timer,
+)
+
+# Event pages requested at once
+MAX_CONCURRENT_REQUESTS = 16
+
+# CSS selector
+PRICE_TAG = "div.ticket-price.hide-mobile"
 
 
 class OztixScraper(WebScraper):
@@ -22,12 +42,12 @@ class OztixScraper(WebScraper):
         self, response: httpx.Response, json_key: str
     ) -> list[dict] | None:
         if "application/json" in response.headers.get("content-type", ""):
-            return response.json().get(self._json_key)
+            return orjson.loads(response.content).get(self._json_key)
         logging.error("No JSON data found.")
         return None
 
     def _get_json_data(self) -> list[dict] | None:
-        r = self._get_post_response(self._url, self._payload)
+        r = get_post_response(self._url, self._payload)
         return None if r is None else self._create_data_cache(r, self._json_key)
 
     def _build_initial_dataset(self, event_data: list[dict]):
@@ -43,7 +63,7 @@ class OztixScraper(WebScraper):
                     url=data["eventUrl"],
                     image=data["eventImage1"],
                 )
-                result.append(gig.model_dump())
+                result.append(gig.to_dict())
             except Exception as exc:
                 logging.error(
                     f"Unable to fetch data: {exc} ({data.get('EventUrl', '-')})"
@@ -55,50 +75,47 @@ class OztixScraper(WebScraper):
         return None if event_data is None else self._build_initial_dataset(event_data)
 
 
+@dataclass(slots=True)
 class OztixGig(Gig):
     source: str = "Oztix"
 
-    @field_validator("title")
-    def remove_accents(cls, text):
-        return (
-            unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-        )
-
-
-def get_html(client: httpx.Client, url: str) -> HTMLParser | None:
-    try:
-        response = client.get(url)
-        return HTMLParser(response.text)
-    except httpx.HTTPError as exc:
-        logging.error(f"Unable to get HTML at URL '{url}': {exc}.")
-        return None
+    def __post_init__(self) -> None:
+        self.title = remove_accents(self.title)
 
 
-def extract_ticket_price(html: HTMLParser, tag: str) -> float:
-    nodes = html.css(tag)
-    prices = [
-        float(node.css_first(tag).text().strip().replace("$", "").replace(",", ""))
-        for node in nodes
-    ]
-    return float(min(prices)) if prices else 0.0
+def extract_ticket_price(html: LexborHTMLParser, tag: str) -> float:
+    return min((parse_price(node.text()) for node in html.css(tag)), default=0.0)
 
 
-def extract_price_from_event(client: httpx.Client, event: dict, price_tag: str):
-    tree = get_html(client, event["url"])
-    if tree is not None:
-        price = extract_ticket_price(tree, price_tag)
-        event["price"] = price
-    return event
-
-
-def get_prices(data: list[dict], price_tag: str, headers: dict[str, str]) -> list[dict]:
-    result = []
-    with httpx.Client(headers=headers) as client:
-        result.extend(
-            extract_price_from_event(client, event, price_tag) for event in data
+async def extract_price_from_url(
+    client: httpx.AsyncClient,
+    url: str,
+    price_tag: str,
+    semaphore: asyncio.Semaphore,
+) -> float | None:
+    r = await fetch(client, url, semaphore)
+    if r is None:
+        return None
+    return extract_ticket_price(LexborHTMLParser(r.content), price_tag)
+
+
+async def get_prices(
+    data: list[dict], price_tag: str, headers: dict[str, str]
+) -> list[dict]:
+    # The API can list the same event more than once, so each URL is fetched once
+    urls = list(dict.fromkeys(event["url"] for event in data))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with create_async_client(headers) as client:
+        prices = await asyncio.gather(
+            *(extract_price_from_url(client, url, price_tag, semaphore) for url in urls)
         )
-    logging.warning(f"Found {len(result)} Oztix events.")
-    return result
+
+    url_prices = {url: price for url, price in zip(urls, prices) if price is not None}
+    for event in data:
+        if event["url"] in url_prices:
+            event["price"] = url_prices[event["url"]]
+    logging.warning(f"Found {len(data)} Oztix events.")
+    return data
 
 
 @timer
@@ -110,11 +127,12 @@ def oztix():
     if raw_data is None:
         sys.exit(1)
 
-    price_tag = "div.ticket-price.hide-mobile"
-    final_data_with_prices = get_prices(raw_data, price_tag, custom_headers)
+    final_data_with_prices = asyncio.run(
+        get_prices(raw_data, PRICE_TAG, custom_headers)
+    )
 
     destination_file = "oztix.json"
-    export_json(final_data_with_prices, filepath=save_path("data", destination_file))
+    export_ndjson(final_data_with_prices, filepath=save_path("data", destination_file))
 
 
 if __name__ == "__main__":
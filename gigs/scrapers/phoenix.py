@@ -1,16 +1,39 @@
+import asyncio
 import logging
 import os
 import sys
-import unicodedata
-from datetime import datetime
+from dataclasses import dataclass
 
 import httpx
-from pydantic import field_validator
-from selectolax.parser import HTMLParser
-
-from gigs.utils import Gig, WebScraper, custom_headers, logger, save_path, timer
-
-
+from selectolax.lexbor import LexborHTMLParser
+
+from gigs.utils import (
+    Gig,
+    WebScraper,
+    create_async_client,
+    create_client,
+    custom_headers,
+    export_ndjson,
+    fetch,
+    logger,
+    parse_short_date,
+    remove_accents,
+    save_path,
+    timer,
+)
+
+# Requests in flight at once; kept below the client's keep-alive pool size
+MAX_CONCURRENT_REQUESTS = 16
+
+# CSS selectors
+SEASON_LINK_TAG = "div.header-nav-folder-item > a"
+EVENT_LINK_TAG = "a.sqs-block-image-link"
+IMAGE_TAG = "meta[property='og:image']"
+TITLE_TAG = "div.sqs-html-content > h3"
+DATE_TAG = "div.sqs-html-content > h4"
+
+
+@dataclass(slots=True)
 class PhoenixGig(Gig):
     genre: str = "Contemporary"
     venue: str = "Phoenix Central Park"
@@ -18,48 +41,42 @@ class PhoenixGig(Gig):
     state: str = "NSW"
     source: str = "Phoenix Central Park"
 
-    @field_validator("date")
-    def clean_date(cls, date_str):
-        fmt = "%d %b %Y"
-        return format_date(date_str, fmt)
-
-    @field_validator("title")
-    def remove_accents(cls, text):
-        return (
-            unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-        )
+    def __post_init__(self) -> None:
+        self.date = format_date(self.date)
+        self.title = remove_accents(self.title)
 
 
-def format_date(date_str: str, fmt: str) -> str:
+def format_date(date_str: str) -> str:
     if "—" not in date_str:
-        return datetime.strptime(date_str, fmt).isoformat()
+        return parse_short_date(date_str)
     split = date_str.split("—")  # an 'em dash', not a hyphen | 1—4 Nov 2023
     new_date = f"{split[0]}{split[1][1:]}"
-    return datetime.strptime(new_date, fmt).isoformat()
+    return parse_short_date(new_date)
 
 
-def get_image(html: HTMLParser, tag: str) -> str:
+def get_image(html: LexborHTMLParser, tag: str) -> str:
     meta_tag = html.css_first(tag)
     return meta_tag.attrs.get("content", "-")
 
 
 class PhoenixScraper(WebScraper):
-    def __init__(self) -> None:
+    def __init__(self, client: httpx.Client) -> None:
         super().__init__()
         self.base_url = "https://phoenixcentralpark.com.au"
         self.headers = custom_headers
+        self.client = client
         self.current_season_url = self._get_season_url(self.base_url, self.headers)
 
     def _get_season_url(self, base_url: str, headers: dict[str, str]) -> str | None:
-        r = self._get_request(base_url, headers)
+        r = self._get_request(base_url, headers, self.client)
         if r is None:
             return None
         try:
-            html = HTMLParser(r.text)
+            html = LexborHTMLParser(r.content)
             href = next(
                 (
                     link.attributes["href"]
-                    for link in html.css("div.header-nav-folder-item > a")
+                    for link in html.css(SEASON_LINK_TAG)
                     if "season" in link.text().lower()
                 ),
                 "",
@@ -69,44 +86,59 @@ class PhoenixScraper(WebScraper):
             logging.error(f"Unable to fetch season url: {exc}.")
             return None
 
-    def _build_event_links(self, html: HTMLParser, base_url: str) -> list[str] | None:
-        if links := html.css("a.sqs-block-image-link"):
-            hrefs = [
-                link.css_first("a").attrs.get("href")
-                for link in links
-                if link.css_first("a").attrs.get("href") is not None
-            ]
-            return [f"{base_url}{href}" for href in hrefs if "https" not in href]
+    def _build_event_links(
+        self, html: LexborHTMLParser, base_url: str
+    ) -> list[str] | None:
+        if links := html.css(EVENT_LINK_TAG):
+            hrefs = (link.attributes.get("href") for link in links)
+            # An event can be linked more than once, so keep only the first link
+            return list(
+                dict.fromkeys(
+                    f"{base_url}{href}"
+                    for href in hrefs
+                    if href is not None and "https" not in href
+                )
+            )
         else:
             logging.error("No links for individual events found.")
             return None
 
     def get_event_urls(self, season_url: str) -> list[str] | None:
-        r = self._get_request(season_url, self.headers)
+        r = self._get_request(season_url, self.headers, self.client)
         if r is None:
             return None
-        html = HTMLParser(r.text)
+        html = LexborHTMLParser(r.content)
         return self._build_event_links(html, self.base_url)
 
-    def get_event_data(
-        self, event_urls: list[str], title_tag: str, date_tag: str, image_tag: str
-    ) -> list[dict]:
-        result = []
-        with httpx.Client(headers=self.headers) as client:
-            for url in event_urls:
-                try:
-                    r = client.get(url, headers=self.headers)
-                    html = HTMLParser(r.text)
-                    gig = PhoenixGig(
-                        date=html.css_first(date_tag).text(),
-                        title=html.css_first(title_tag).text(),
-                        url=url,
-                        image=get_image(html, image_tag),
-                    )
-                    result.append(gig.model_dump())
-                except Exception as exc:
-                    logging.error(f"Unable to extract data from URL '{url}': {exc}.")
-        return result
+    async def _get_event(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        semaphore: asyncio.Semaphore,
+    ) -> dict | None:
+        r = await fetch(client, url, semaphore)
+        if r is None:
+            return None
+        try:
+            html = LexborHTMLParser(r.content)
+            gig = PhoenixGig(
+                date=html.css_first(DATE_TAG).text(),
+                title=html.css_first(TITLE_TAG).text(),
+                url=url,
+                image=get_image(html, IMAGE_TAG),
+            )
+            return gig.to_dict()
+        except Exception as exc:
+            logging.error(f"Unable to extract data from URL '{url}': {exc}.")
+            return None
+
+    async def get_event_data(self, event_urls: list[str]) -> list[dict]:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        async with create_async_client(self.headers) as client:
+            events = await asyncio.gather(
+                *(self._get_event(client, url, semaphore) for url in event_urls)
+            )
+        return [gig for gig in events if gig is not None]
 
 
 @timer
@@ -114,23 +146,19 @@ class PhoenixScraper(WebScraper):
 def phoenix():
     logging.warning(f"Running {os.path.basename(__file__)}")
 
-    # Tag variables
-    image_tag = "meta[property='og:image']"
-    title_tag = "div.sqs-html-content > h3"
-    date_tag = "div.sqs-html-content > h4"
-
     # The cool stuff happens here :)
-    scraper = PhoenixScraper()
-    season_url = scraper.current_season_url
-    if season_url is None:
-        sys.exit(1)
-
-    event_urls = scraper.get_event_urls(season_url)
-    if event_urls is None:
-        sys.exit(1)
-
-    data = scraper.get_event_data(event_urls, title_tag, date_tag, image_tag)
-    scraper.export_json(data, filepath=save_path("data", "phoenix.json"))
+    with create_client(custom_headers) as client:
+        scraper = PhoenixScraper(client)
+        season_url = scraper.current_season_url
+        if season_url is None:
+            sys.exit(1)
+
+        event_urls = scraper.get_event_urls(season_url)
+        if event_urls is None:
+            sys.exit(1)
+
+    data = asyncio.run(scraper.get_event_data(event_urls))
+    export_ndjson(data, filepath=save_path("data", "phoenix.json"))
 
 
 if __name__ == "__main__":
@@ -1,23 +1,36 @@
+import asyncio
 import logging
 import os
 import sys
-import unicodedata
-from datetime import datetime
+from dataclasses import dataclass
 
 import httpx
-from pydantic import field_validator
-from selectolax.parser import HTMLParser, Node
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
 from gigs.utils import (
     Gig,
     WebScraper,
+    create_async_client,
     custom_headers,
-    export_json,
+    export_ndjson,
+    fetch,
     logger,
+    parse_short_date,
+    remove_accents,
     save_path,
     timer,
 )
 
+# Listing pages requested at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# CSS selectors
+CARD_TAG = "div.soh-card.soh-card--whats-on.soh--card"
+DATE_TAG = "time"
+TITLE_TAG = "span.soh-card__title-text"
+GENRE_TAG = "p.soh-card__category"
+LAST_PAGE_TAG = "li.pager__item.pager__item--last > a"
+
 
 class SOHScraper(WebScraper):
     def __init__(self) -> None:
@@ -25,18 +38,13 @@ class SOHScraper(WebScraper):
         self.home_url = "https://www.sydneyoperahouse.com"
         self.base_url = f"{self.home_url}/whats-on?page="
         self._headers = custom_headers
-        self._card_tag = "div.soh-card.soh-card--whats-on.soh--card"
-        self._date_tag = "time"
-        self._title_tag = "span.soh-card__title-text"
-        self._genre_tag = "p.soh-card__category"
-        self._end_page = self._get_end_page()
-        self._event_cards = self._get_event_cards()
+        self._end_page: int | None = None
+        self._event_cards = asyncio.run(self._run())
         self.event_data = self._extract_event_data()
 
-    def _extract_page_num(self, response: httpx.Response) -> int | None:
-        tag = "li.pager__item.pager__item--last > a"
-        html = HTMLParser(response.text)
-        end_page = html.css_first(tag).attributes.get("href")
+    def _extract_page_num(self, html: LexborHTMLParser) -> int | None:
+        node = html.css_first(LAST_PAGE_TAG)
+        end_page = None if node is None else node.attributes.get("href")
         if end_page is None:
             return None
         try:
@@ -46,35 +54,56 @@ class SOHScraper(WebScraper):
             logging.error(f"Error extracting end page number: {err}.")
             return None
 
-    def _get_end_page(self) -> int | None:
-        url = f"{self.base_url}{0}"
-        r = self._get_request(url, self._headers)
-        return None if r is None else self._extract_page_num(r)
-
-    def _get_event_cards(self) -> list[Node] | None:
+    async def _run(self) -> list[LexborNode] | None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        async with create_async_client(self._headers) as client:
+            # The first page is parsed once for both the page count and its cards
+            r = await fetch(client, f"{self.base_url}{0}", semaphore)
+            if r is None:
+                return None
+            first_page = LexborHTMLParser(r.content)
+            self._end_page = self._extract_page_num(first_page)
+            return await self._get_event_cards(client, semaphore, first_page)
+
+    async def _get_event_cards(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        first_page: LexborHTMLParser,
+    ) -> list[LexborNode] | None:
         end_page = self._end_page
         if end_page is None:
             return None
 
         # Extract event cards
-        result = []
-        with httpx.Client(headers=self._headers) as client:
-            for page in range(end_page):
-                url = f"{self.base_url}{page}"
-                try:
-                    r = client.get(url)
-                    html = HTMLParser(r.text)
-                    result.extend(html.css(self._card_tag))
-                except Exception as exc:
-                    logging.error(f"Error fetching cards at URL '{url}': {exc}.")
+        pages = await asyncio.gather(
+            *(
+                self._get_page_cards(client, semaphore, f"{self.base_url}{page}")
+                for page in range(1, end_page)
+            )
+        )
+        result = first_page.css(CARD_TAG)
+        result.extend(card for cards in pages for card in cards)
         return result
 
-    def _get_date(self, card: Node, date_tag: str) -> str:
+    async def _get_page_cards(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str
+    ) -> list[LexborNode]:
+        r = await fetch(client, url, semaphore)
+        if r is None:
+            return []
+        try:
+            return LexborHTMLParser(r.content).css(CARD_TAG)
+        except Exception as exc:
+            logging.error(f"Error fetching cards at URL '{url}': {exc}.")
+            return []
+
+    def _get_date(self, card: LexborNode, date_tag: str) -> str:
         """
         Fetches the date from a given card using the specified node_date.
 
         Args:
-            card (selectolax.parser.Node): The card from which to fetch the date.
+            card (selectolax.lexbor.LexborNode): The card from which to fetch the date.
             node_date (str): The CSS selector for the date node.
 
         Returns:
@@ -83,17 +112,17 @@ class SOHScraper(WebScraper):
         date = card.css(date_tag)
         return date[-1].text().strip()
 
-    def _get_title(self, card: Node, title_tag: str) -> str:
+    def _get_title(self, card: LexborNode, title_tag: str) -> str:
         return card.css_first(title_tag).text().strip()
 
-    def _get_genre(self, card: Node, genre_tag: str) -> str:
+    def _get_genre(self, card: LexborNode, genre_tag: str) -> str:
         return card.css_first(genre_tag).text()
 
-    def _create_url(self, card: Node) -> str:
+    def _create_url(self, card: LexborNode) -> str:
         href = card.css_first("a").attributes["href"]
         return f"{self.home_url}{href}"
 
-    def _get_image(self, card: Node) -> str:
+    def _get_image(self, card: LexborNode) -> str:
         src_link = card.css_first("img").attributes["src"]
         return f"{self.home_url}{src_link}"
 
@@ -107,43 +136,29 @@ class SOHScraper(WebScraper):
         for card in cards:
             try:
                 gig = SydneyOperaHouseGig(
-                    date=self._get_date(card, self._date_tag),
-                    title=self._get_title(card, self._title_tag),
-                    genre=self._get_genre(card, self._genre_tag),
+                    date=self._get_date(card, DATE_TAG),
+                    title=self._get_title(card, TITLE_TAG),
+                    genre=self._get_genre(card, GENRE_TAG),
                     url=self._create_url(card),
                     image=self._get_image(card),
                 )
-                result.append(gig.model_dump())
+                result.append(gig.to_dict())
             except Exception as exc:
                 logging.error(f"Unable to retrieve card information: {exc}.")
         logging.warning(f"Found {result.__len__()} Sydney Opera House events.")
         return result
 
 
+@dataclass(slots=True)
 class SydneyOperaHouseGig(Gig):
     venue: str = "Sydney Opera House"
     suburb: str = "Sydney"
     state: str = "NSW"
     source: str = "Sydney Opera House"
 
-    @field_validator("date")
-    def clean_date(cls, date_str):
-        fmt = "%d %b %Y"
-        return (
-            format_date(f"0{date_str}", fmt)
-            if date_str[1].isspace()
-            else format_date(date_str, fmt)
-        )
-
-    @field_validator("title")
-    def remove_accents(cls, text):
-        return (
-            unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-        )
-
-
-def format_date(date_str: str, format_str: str) -> str:
-    return datetime.strptime(date_str, format_str).isoformat()
+    def __post_init__(self) -> None:
+        self.date = parse_short_date(self.date)
+        self.title = remove_accents(self.title)
 
 
 @timer
@@ -155,7 +170,7 @@ def sydney_opera_house():
     if data is None:
         sys.exit(1)
     destination_file = "sydney_opera_house.json"
-    export_json(data, filepath=save_path("data", destination_file))
+    export_ndjson(data, filepath=save_path("data", destination_file))
 
 
 if __name__ == "__main__":
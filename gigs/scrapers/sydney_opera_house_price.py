@@ -1,50 +1,60 @@
+import asyncio
 import logging
 import os
 import re
 
 import httpx
-from selectolax.parser import HTMLParser
-from gigs.utils import export_json, logger, open_json, save_path, timer, custom_headers
-
-
-def find_lowest_price(price_list: list[str]) -> float:
-    convert_to_floats = list(
-        map(lambda i: float(i.replace("$", "").replace(",", "")), price_list)
+from selectolax.lexbor import LexborHTMLParser
+from gigs.utils import (
+    create_async_client,
+    export_ndjson,
+    fetch,
+    logger,
+    open_ndjson,
+    parse_price,
+    save_path,
+    timer,
+    custom_headers,
+)
+
+# Event pages requested at once
+MAX_CONCURRENT_REQUESTS = 16
+PRICE_PATTERN = re.compile(r"\$[\d,]+(?:\.\d{2})?")
+
+
+def compile_price(html: LexborHTMLParser) -> float:
+    # Scan each table's text as it is read rather than joining them first
+    return min(
+        (
+            parse_price(match.group())
+            for table in html.css("table")
+            for match in PRICE_PATTERN.finditer(table.text())
+        ),
+        default=0.0,
     )
-    return min(convert_to_floats)
-
-
-def find_prices(text: str) -> list[str]:
-    pattern = r"\$[\d,]+(?:\.\d{2})?"
-    return re.findall(pattern, text)
-
-
-def extract_text(html: HTMLParser, tag: str) -> str:
-    tables = html.css(tag)
-    return "".join(table.text() for table in tables)
 
 
-def compile_price(html: HTMLParser) -> float:
-    text = extract_text(html=html, tag="table")
-    if price_list := find_prices(text):
-        return find_lowest_price(price_list)
-    else:
-        return 0.0
+async def get_price_from_event(
+    client: httpx.AsyncClient, event: dict, semaphore: asyncio.Semaphore
+) -> dict:
+    # Failed events stay unpriced rather than drop out of the rewritten file
+    response = await fetch(client, event["url"], semaphore)
+    if response is None:
+        return event
+    try:
+        tree = LexborHTMLParser(response.content)
+        event["price"] = compile_price(html=tree)
+    except Exception as exc:
+        logging.error(f"Error fetching price from URL '{event['url']}': {exc}.")
+    return event
 
 
-def get_prices_from_events(events: list[dict], headers: dict[str, str]):
-    result = []
-    with httpx.Client(headers=headers) as client:
-        for event in events:
-            try:
-                response = client.get(event["url"])
-                tree = HTMLParser(response.text)
-                min_price = compile_price(html=tree)
-                event["price"] = min_price
-                result.append(event)
-            except Exception as exc:
-                logging.error(f"Error fetching price from URL '{event['url']}': {exc}.")
-    return result
+async def get_prices_from_events(events: list[dict], headers: dict[str, str]):
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with create_async_client(headers) as client:
+        return await asyncio.gather(
+            *(get_price_from_event(client, event, semaphore) for event in events)
+        )
 
 
 @timer
@@ -55,10 +65,10 @@ def soh_fetch_price():
     headers = custom_headers
 
     fp_json = save_path("data", "sydney_opera_house.json")
-    events = open_json(filepath=fp_json)
-    data = get_prices_from_events(events, headers)
+    events = open_ndjson(filepath=fp_json)
+    data = asyncio.run(get_prices_from_events(events, headers))
 
-    export_json(data, filepath=save_path("data", fp_json))
+    export_ndjson(data, filepath=save_path("data", fp_json))
 
 
 if __name__ == "__main__":
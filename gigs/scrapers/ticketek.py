@@ -1,54 +1,73 @@
+import asyncio
 import logging
 import os
-import unicodedata
+from dataclasses import dataclass
 
 import httpx
-from dateutil import parser
-from pydantic import field_validator
-from selectolax.parser import HTMLParser, Node
-
-from gigs.utils import Gig, export_json, logger, save_path, timer
-
-
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+from gigs.utils import (
+    Gig,
+    create_async_client,
+    export_ndjson,
+    fetch,
+    logger,
+    parse_short_date,
+    remove_accents,
+    save_path,
+    timer,
+)
+
+# Search pages requested at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# CSS selectors
+EVENT_TAG = "div.resultModule"
+SHOW_TAG = "div.contentEventAndDate.clearfix"
+LOCATION_TAG = "div.contentLocation"
+DATE_TAG = "div.contentDate"
+
+
+@dataclass(slots=True)
 class TicketekGig(Gig):
     source: str = "Ticketek"
 
-    @field_validator("title")
-    def remove_accents(cls, text):
-        return (
-            unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-        )
+    def __post_init__(self) -> None:
+        self.title = remove_accents(self.title)
 
 
 class TicketekScraper:
     def __init__(self) -> None:
         self._last_page = 24
-        self._event_tag = "div.resultModule"
-
-    def get_events(self, base_url: str) -> list[Node]:
-        total_events = []
-        with httpx.Client() as client:
-            for page in range(1, self._last_page):
-                url = f"{base_url}{page}"
-                try:
-                    r = client.get(url, follow_redirects=True)
-                    html = HTMLParser(r.text)
-                    total_events.extend(html.css(self._event_tag))
-                except Exception as exc:
-                    logging.error(f"Error fetching data from url '{url}': {exc}.")
+
+    async def get_events(self, base_url: str) -> list[LexborNode]:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        async with create_async_client() as client:
+            pages = await asyncio.gather(
+                *(
+                    self._get_page_events(client, semaphore, f"{base_url}{page}")
+                    for page in range(1, self._last_page)
+                )
+            )
+        total_events = [event for events in pages for event in events]
         logging.warning(f"Found {len(total_events)} event nodes.")
         return total_events
 
+    async def _get_page_events(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str
+    ) -> list[LexborNode]:
+        r = await fetch(client, url, semaphore)
+        if r is None:
+            return []
+        try:
+            return LexborHTMLParser(r.content).css(EVENT_TAG)
+        except Exception as exc:
+            logging.error(f"Error fetching data from url '{url}': {exc}.")
+            return []
 
-class TicketekEventData:
-    def __init__(self) -> None:
-        self._tag = {
-            "date": "div.contentDate",
-            "venue": "div.contentEventAndDate.clearfix",
-            "location": "div.contentLocation",
-        }
 
-    def get_data(self, events: list[Node]):
+class TicketekEventData:
+    def get_data(self, events: list[LexborNode]):
         result = []
         for event in events:
             title = self._get_title(event)
@@ -57,21 +76,17 @@ class TicketekEventData:
 
             gigs = [
                 self._build_individual_event(show, title, url, image)
-                for show in event.css(self._tag["venue"])
+                for show in event.css(SHOW_TAG)
             ]
             result.extend(gigs)
         logging.warning(f"Successfully parsed {len(result)} events.")
         return result
 
-    def _get_title(self, event: Node) -> str:
-        try:
-            title = event.css_first("h6")
-            return "-" if title is None else title.text(strip=True)
-        except AttributeError as err:
-            logging.error(f"Unable to parse Title in event: {err}")
-            return "-"
+    def _get_title(self, event: LexborNode) -> str:
+        title = event.css_first("h6")
+        return "-" if title is None else title.text(strip=True)
 
-    def _get_url(self, event: Node) -> str:
+    def _get_url(self, event: LexborNode) -> str:
         base_url = "https://premier.ticketek.com.au"
         try:
             href = event.css_first("a").attributes["href"]
@@ -79,19 +94,19 @@ class TicketekEventData:
         except Exception:
             return "-"
 
-    def _get_image(self, event: Node) -> str:
+    def _get_image(self, event: LexborNode) -> str:
         try:
             image = event.css_first("img").attributes["src"]
             return f"https:{image}"
         except Exception:
             return "-"
 
-    def _build_individual_event(self, event: Node, title: str, url: str, image: str):
-        venue, suburb, state = self._get_location(
-            event, location_tag=self._tag["location"]
-        )
+    def _build_individual_event(
+        self, event: LexborNode, title: str, url: str, image: str
+    ):
+        venue, suburb, state = self._get_location(event, location_tag=LOCATION_TAG)
         gig = TicketekGig(
-            date=self._get_date(event, tag=self._tag["date"]),
+            date=self._get_date(event, tag=DATE_TAG),
             title=title,
             venue=venue,
             suburb=suburb,
@@ -99,9 +114,9 @@ class TicketekEventData:
             url=url,
             image=image,
         )
-        return gig.model_dump()
+        return gig.to_dict()
 
-    def _get_location(self, event: Node, location_tag: str) -> tuple[str, ...]:
+    def _get_location(self, event: LexborNode, location_tag: str) -> tuple[str, ...]:
         try:
             text = event.css_first(location_tag).text().strip()
             address = [i.strip() for i in text.split(",")]
@@ -117,17 +132,20 @@ class TicketekEventData:
         venue = f"{loc[0]}, {loc[1]}"
         return venue, loc[2], loc[3]
 
-    def _get_date(self, event: Node, tag: str) -> str:
+    def _get_date(self, event: LexborNode, tag: str) -> str:
         date_object = event.css_first(tag)
         if date_object is None:
             return "2099-01-01T00:00:00"
         return self._date_to_iso8601(date_object)
 
-    def _date_to_iso8601(self, date_object: Node) -> str:
+    def _date_to_iso8601(self, date_object: LexborNode) -> str:
         date_str = date_object.text().strip()  # Sat 02 Nov 2024
+        # The weekday is usually there but not always, e.g. '02 Nov 2024'
+        parts = date_str.split()
+        if parts and parts[0].isalpha():
+            parts = parts[1:]
         try:
-            parsed_date = parser.parse(date_str[:15])
-            return parsed_date.isoformat()
+            return parse_short_date(" ".join(parts[:3]))
         except ValueError:
             return "2099-01-01T00:00:00"
 
@@ -140,9 +158,9 @@ def ticketek():
     base_url_for_concerts = (
         "https://premier.ticketek.com.au/shows/genre.aspx?c=2048&page="
     )
-    events = TicketekScraper().get_events(base_url_for_concerts)
+    events = asyncio.run(TicketekScraper().get_events(base_url_for_concerts))
     data = TicketekEventData().get_data(events)
-    export_json(data, filepath=save_path("data", "ticketek.json"))
+    export_ndjson(data, filepath=save_path("data", "ticketek.json"))
 
 
 if __name__ == "__main__":
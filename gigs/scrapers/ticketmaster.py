@@ -1,23 +1,34 @@
 import logging
 import os
 import sys
+from dataclasses import dataclass
 
 import httpx
+import orjson
 from dotenv import load_dotenv
-from gigs.utils import Gig, WebScraper, logger, save_path, timer
+from gigs.utils import (
+    Gig,
+    WebScraper,
+    create_client,
+    export_ndjson,
+    logger,
+    save_path,
+    timer,
+)
 
 
 class TicketmasterScraper(WebScraper):
-    def __init__(self) -> None:
+    def __init__(self, client: httpx.Client) -> None:
         super().__init__()
         load_dotenv()
+        self.client = client
         self._api_key = str(os.getenv("TM_KEY"))
         self.end_page = self._get_end_page(self._api_key)
 
     def _get_end_page(self, api_key: str) -> int | None:
         url = f"https://app.ticketmaster.com/discovery/v2/events.json?classificationName=music&countryCode=AU&page=0&apikey={api_key}"  # noqa
         try:
-            json = httpx.get(url).json()
+            json = orjson.loads(self.client.get(url).content)
             return json["page"]["totalPages"]
         except Exception as exc:
             logging.error(f"Error fetching end page from JSON: {exc}.")
@@ -25,14 +36,13 @@ class TicketmasterScraper(WebScraper):
 
     def get_events(self, end_page: int, cache_file: str) -> list[dict] | None:
         events = []
-        with httpx.Client() as client:
-            for page in range(end_page):
-                url = f"https://app.ticketmaster.com/discovery/v2/events.json?classificationName=music&countryCode=AU&page={page}&apikey={self._api_key}"  # noqa
-                try:
-                    json = client.get(url).json()["_embedded"]["events"]
-                    events.extend(json)
-                except Exception as exc:
-                    logging.error(f"Error fetching JSON '{url}': {exc}.")
+        for page in range(end_page):
+            url = f"https://app.ticketmaster.com/discovery/v2/events.json?classificationName=music&countryCode=AU&page={page}&apikey={self._api_key}"  # noqa
+            try:
+                json = orjson.loads(self.client.get(url).content)["_embedded"]["events"]
+                events.extend(json)
+            except Exception as exc:
+                logging.error(f"Error fetching JSON '{url}': {exc}.")
         if not events:
             return None
         logging.warning(f"Found {events.__len__()} Ticketmaster events.")
@@ -55,13 +65,14 @@ class TicketmasterScraper(WebScraper):
                     url=url,
                     image=get_image(event),
                 )
-                result.append(gig.model_dump())
+                result.append(gig.to_dict())
             except Exception as exc:
                 logging.error(f"Error parsing data for '{url}': {exc}.")
         logging.warning(f"Saved {result.__len__()} Ticketmaster events.")
-        self.export_json(result, filepath=save_path("data", data_file))
+        export_ndjson(result, filepath=save_path("data", data_file))
 
 
+@dataclass(slots=True)
 class TicketmasterGig(Gig):
     genre: str = "Music"
     source: str = "Ticketmaster"
@@ -112,14 +123,15 @@ def ticketmaster():
     destination_cache_file = "ticketmaster_cache.json"
     destination_data_file = "ticketmaster.json"
 
-    scraper = TicketmasterScraper()
-    end_page = scraper.end_page
-    if end_page is None:
-        sys.exit(1)
+    with create_client() as client:
+        scraper = TicketmasterScraper(client)
+        end_page = scraper.end_page
+        if end_page is None:
+            sys.exit(1)
 
-    events = scraper.get_events(end_page, destination_cache_file)
-    if events is None:
-        sys.exit(1)
+        events = scraper.get_events(end_page, destination_cache_file)
+        if events is None:
+            sys.exit(1)
 
     data = scraper.get_data(events, destination_data_file)
 
@@ -1,13 +1,36 @@
-import json
+import asyncio
 import logging
 import os
+import random
+import sys
 import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
 
+import chompjs
 import httpx
-from pydantic import BaseModel
+import orjson
 
 
-class Gig(BaseModel):
+# Text fields of `Gig`; dataclasses do not check types, so `to_dict` does
+GIG_TEXT_FIELDS = (
+    "date",
+    "title",
+    "genre",
+    "venue",
+    "suburb",
+    "state",
+    "url",
+    "image",
+    "source",
+)
+
+
+@dataclass(slots=True)
+class Gig:
     date: str = "2099-01-01T00:00:00"
     title: str = "-"
     price: float = 0.0
@@ -19,33 +42,121 @@ class Gig(BaseModel):
     image: str = "-"
     source: str = "-"
 
+    def to_dict(self) -> dict[str, str | float]:
+        """
+        Raises:
+            TypeError: If a text field is not a string, e.g. a JSON-LD list or null,
+            which would otherwise break concatenating the NDJSON files.
+            ValueError: If the price cannot be converted to a float.
+        """
+        for name in GIG_TEXT_FIELDS:
+            value = getattr(self, name)
+            if not isinstance(value, str):
+                raise TypeError(
+                    f"Expected str for '{name}', got {type(value).__name__}"
+                )
+        # Cased here, once per scrape, rather than on every table build. The
+        # low-cardinality columns are interned so every record shares one copy.
+        return {
+            "date": self.date,
+            "title": self.title.lower(),
+            "price": float(self.price),
+            "genre": sys.intern(self.genre),
+            "venue": sys.intern(self.venue.lower()),
+            "suburb": sys.intern(capitalize_text(self.suburb)),
+            "state": sys.intern(self.state),
+            "url": self.url,
+            "image": self.image,
+            "source": self.source,
+        }
+
+
+# Currency symbols, thousands separators and whitespace, removed in one pass
+PRICE_TABLE = str.maketrans("", "", "$, \t\n\r")
+
+
+def parse_price(text: str) -> float:
+    """Converts a price such as ' $1,250.00 ' to a float."""
+    return float(text.translate(PRICE_TABLE))
+
+
+def capitalize_text(text: str) -> str:
+    if " " in text:
+        words = text.split(" ")
+        return " ".join(word.capitalize() for word in words)
+    return text.capitalize()
+
+
+@lru_cache(maxsize=4096)
+def _strip_accents(text: str) -> str:
+    return unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
+
+
+# Latin-1 Supplement and Latin Extended-A, mapped to what `_strip_accents` returns
+ACCENT_TABLE = str.maketrans(
+    {chr(i): _strip_accents(chr(i)) for i in range(0x80, 0x180)}
+)
+
+
+def remove_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    text = text.translate(ACCENT_TABLE)
+    return text if text.isascii() else _strip_accents(text)
+
+
+MONTH_ABBREVIATIONS = {
+    month: number
+    for number, month in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+        + ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
+
+
+def parse_short_date(date_str: str) -> str:
+    """
+    Converts a '%d %b %Y' date, e.g. '4 Nov 2023', to ISO 8601 without going
+    through `datetime.strptime`.
+
+    Raises:
+        ValueError: If the date is not in the expected format.
+    """
+    try:
+        day, month, year = date_str.split()
+        return datetime(
+            int(year), MONTH_ABBREVIATIONS[month.title()], int(day)
+        ).isoformat()
+    except KeyError as exc:
+        raise ValueError(f"Unknown month in date '{date_str}'.") from exc
+
 
 class WebScraper:
     def __init__(self) -> None:
         pass
 
     def export_json(self, data, filepath: str) -> None:
-        try:
-            with open(filepath, "w") as f:
-                json.dump(data, f)
-                logging.warning(f"Saved data to {filepath}.")
-        except Exception as exc:
-            logging.error(f"Error downloading JSON: {exc}")
-            return None
+        export_json(data, filepath)
 
-    def _get_request(self, url: str, headers: dict[str, str]) -> httpx.Response | None:
+    def _get_request(
+        self, url: str, headers: dict[str, str], client: httpx.Client | None = None
+    ) -> httpx.Response | None:
         """
         Sends a GET request to the specified URL with the provided headers and returns the response.
 
         Args:
             url (str): The URL to send the GET request to.
             headers (dict): The headers to include in the request.
+            client (httpx.Client | None): A client whose open connections are reused;
+                without one, the request is sent on a new connection.
 
         Returns:
             httpx.Response | None: The response object if the request is successful, or `None` if an HTTP error occurs.
         """
         try:
-            response = httpx.get(url, headers=headers, follow_redirects=True)
+            send = httpx.get if client is None else client.get
+            response = send(url, headers=headers, follow_redirects=True)
             response.raise_for_status()
             return response
         except httpx.HTTPError as exc:
@@ -123,6 +234,112 @@ def get_request(url: str, headers: dict[str, str]) -> httpx.Response | None:
         return None
 
 
+CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+CLIENT_TIMEOUT = httpx.Timeout(20.0, connect=10.0)
+# Connection attempts retried by the transport before a request is sent
+CONNECT_RETRIES = 3
+
+
+def create_async_client(headers: dict[str, str] | None = None) -> httpx.AsyncClient:
+    """
+    Creates an HTTP/2 client with a connection pool, so that every request made to
+    the same host reuses an open connection instead of a new TCP and TLS handshake.
+    Failed connection attempts are retried by the transport.
+
+    Args:
+        headers (dict | None): The headers to include in every request.
+
+    Returns:
+        httpx.AsyncClient: The client; close it with `async with` or `aclose()`.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        http2=True, limits=CLIENT_LIMITS, retries=CONNECT_RETRIES
+    )
+    return httpx.AsyncClient(
+        headers=headers,
+        transport=transport,
+        timeout=CLIENT_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+def create_client(headers: dict[str, str] | None = None) -> httpx.Client:
+    """
+    Creates the synchronous counterpart of `create_async_client`, for scrapers that
+    still fetch pages in a loop.
+
+    Args:
+        headers (dict | None): The headers to include in every request.
+
+    Returns:
+        httpx.Client: The client; close it with `with` or `close()`.
+    """
+    transport = httpx.HTTPTransport(
+        http2=True, limits=CLIENT_LIMITS, retries=CONNECT_RETRIES
+    )
+    return httpx.Client(
+        headers=headers,
+        transport=transport,
+        timeout=CLIENT_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+# Responses worth another attempt: rate limiting and transient server errors
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Transient transport failures; protocol and URL errors will not fix themselves
+RETRY_EXCEPTIONS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
+
+def is_retryable(exc: httpx.HTTPError | httpx.InvalidURL) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUS_CODES
+    return isinstance(exc, RETRY_EXCEPTIONS)
+
+
+async def fetch(
+    client: httpx.AsyncClient,
+    url: str,
+    semaphore: asyncio.Semaphore,
+    retries: int = 3,
+) -> httpx.Response | None:
+    """
+    Sends an asynchronous GET request to the specified URL, waiting on the semaphore
+    so that only a bounded number of requests are in flight at once. Timeouts,
+    connection errors and 429/5xx responses are retried with exponential backoff;
+    the semaphore is released while backing off so other requests can proceed.
+
+    Args:
+        client (httpx.AsyncClient): The client used to send the request.
+        url (str): The URL to send the GET request to.
+        semaphore (asyncio.Semaphore): Caps the number of concurrent requests.
+        retries (int): The maximum number of attempts.
+
+    Returns:
+        httpx.Response | None: The response object if the request is successful, or `None` if an HTTP error occurs or the URL is invalid.
+    """
+    for attempt in range(retries):
+        async with semaphore:
+            try:
+                response = await client.get(url)
+                response.raise_for_status()
+                return response
+            except (httpx.HTTPError, httpx.InvalidURL) as exc:
+                # InvalidURL is not an HTTPError; a malformed href must not abort
+                # the caller's gather
+                error = exc
+        if attempt == retries - 1 or not is_retryable(error):
+            break
+        # Jitter keeps concurrent retries from hitting the server in lockstep
+        await asyncio.sleep(min(0.5 * 2**attempt, 5) + random.random() * 0.1)
+    logging.error(f"Request error occurred for URL '{url}': {error}.")
+    return None
+
+
 payload = {"options": {"use": 0, "geo": None, "postcode": None}}
 
 
@@ -137,15 +354,50 @@ def get_post_response(url: str, payload: dict) -> httpx.Response | None:
 
 
 def open_json(filepath: str):
-    with open(filepath, "r") as f:
-        data = json.load(f)
+    with open(filepath, "rb") as f:
+        data = orjson.loads(f.read())
     return data
 
 
 def export_json(data, filepath: str) -> None:
     try:
-        with open(filepath, "w") as f:
-            json.dump(data, f)
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(data))
+        logging.warning(f"Saved data to {filepath}.")
+    except Exception as exc:
+        logging.error(f"Error downloading JSON: {exc}")
+        return None
+
+
+def parse_json_ld(text: str) -> Any:
+    # JSON-LD is meant to be strict JSON; chompjs only handles pages where it isn't
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return chompjs.parse_js_object(text)
+
+
+def open_ndjson(filepath: str) -> list[dict]:
+    with open(filepath, "rb") as f:
+        data = [orjson.loads(line) for line in f if line.strip()]
+    return data
+
+
+def export_ndjson(data: list[dict], filepath: str) -> None:
+    """
+    Exports a list of records as newline-delimited JSON, one record per line, so
+    that the tables can be scanned lazily by `build_tables`.
+
+    Args:
+        data (list[dict]): The records to export.
+        filepath (str): The path of the file to write to.
+    """
+    try:
+        with open(filepath, "wb") as f:
+            f.writelines(
+                orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+                for record in data
+            )
     except Exception as exc:
         logging.error(f"Error downloading JSON: {exc}")
         return None